@@ -9,20 +9,37 @@ Features:
 
 import asyncio
 import ctypes
+import hashlib
+import io
+import json
 import logging
 import os
 import platform
 import queue
+import re
+import sqlite3
 import threading
-from collections import defaultdict
-from datetime import datetime
+import time
+from collections import OrderedDict, defaultdict, deque
+from collections.abc import Callable
+from contextlib import contextmanager
 from pathlib import Path
 
-import anthropic
 import customtkinter as ctk
+
+try:
+    import uvloop  # optional: C-implemented event loop, big gateway wins
+except ImportError:
+    uvloop = None
 import discord
 from dotenv import load_dotenv
 
+# anthropic (and the httpx stack underneath it) imports lazily in
+# ClaudeHandler.__init__ - the GUI doesn't need either until the user
+# actually connects, and both are expensive to import. discord must stay
+# top-level (KeithBot subclasses discord.Client) and dotenv must run
+# before Config reads the environment.
+
 # =============================================================================
 # High-DPI Awareness (Windows)
 # =============================================================================
@@ -64,7 +81,6 @@ class Config:
     BOT_TOKEN: str = os.getenv("DISCORD_BOT_TOKEN", "")
     ANTHROPIC_API_KEY: str = os.getenv("ANTHROPIC_API_KEY", "")
     CLAUDE_MODEL: str = os.getenv("CLAUDE_MODEL", "claude-sonnet-4-20250514")
-    RELEVANCE_MODEL: str = os.getenv("RELEVANCE_MODEL", "claude-3-5-haiku-20241022")
     
     # System prompt for Keith's personality
     SYSTEM_PROMPT: str = os.getenv(
@@ -77,9 +93,33 @@ class Config:
     
     # Conversation settings
     MAX_CONVERSATION_HISTORY: int = int(os.getenv("MAX_CONVERSATION_HISTORY", "20"))
+    MAX_CONVERSATION_CHANNELS: int = int(os.getenv("MAX_CONVERSATION_CHANNELS", "500"))
+    CONVERSATION_TTL_SECONDS: int = int(os.getenv("CONVERSATION_TTL_SECONDS", "21600"))  # 6 hours
+    CONVERSATION_DB_PATH: str = os.getenv(
+        "CONVERSATION_DB_PATH",
+        str(Path(__file__).parent / "keith_memory.db")
+    )
     RECENT_CHANNEL_MESSAGES: int = int(os.getenv("RECENT_CHANNEL_MESSAGES", "7"))
     DISCORD_MAX_LENGTH: int = 2000
     MAX_TOKENS: int = 4096
+
+    # Outgoing manual-send queue cap; oldest entries drop past this
+    OUTGOING_QUEUE_MAX: int = int(os.getenv("KEITH_OUTGOING_QUEUE_MAX", "64"))
+
+    # GUI log panels keep at most this many lines (ring-buffer trim)
+    MAX_LOG_LINES: int = int(os.getenv("KEITH_MAX_LOG_LINES", "2000"))
+
+    # Client-side request budget for the Claude API (requests per minute)
+    CLAUDE_REQUESTS_PER_MINUTE: int = int(os.getenv("KEITH_CLAUDE_RPM", "50"))
+
+    # Seconds after a response before the prompt-cache keepalive fires
+    # (Anthropic's cache TTL is ~5 min; 0 disables the keepalive)
+    CACHE_KEEPALIVE_SECONDS: int = int(os.getenv("KEITH_CACHE_KEEPALIVE_SECONDS", "240"))
+
+    # Set to 0 to drop purely diagnostic console logs (per-message "Skipped"
+    # lines in smart mode, per-send manual echoes) before the f-string is
+    # even built - they run once per message on busy channels.
+    VERBOSE_CONSOLE: bool = os.getenv("KEITH_VERBOSE_CONSOLE", "1") == "1"
     
     # Voice channel to gather everyone into
     GATHER_VOICE_CHANNEL_ID: int = int(os.getenv("GATHER_VOICE_CHANNEL_ID", "1084054075613659206"))
@@ -105,152 +145,552 @@ class Config:
 # Claude Handler
 # =============================================================================
 
+# User mention as it appears in raw message content: <@id> or <@!id>
+_MENTION_RE = re.compile(r"<@!?(\d+)>")
+
+# Word tokens used to normalize messages for the relevance-verdict cache.
+# \w keeps non-Latin scripts distinct; the fold should only collapse case,
+# punctuation and spacing variants, never whole foreign-language messages.
+_WORD_RE = re.compile(r"[\w']+")
+
+# High-confidence shortcuts for the relevance check: messages addressed to
+# Keith head-on are a clear YES, talk about the bot in the third person is a
+# clear NO. Only ambiguous messages pay for the Haiku round trip.
+_RELEVANCE_YES_RE = re.compile(r"^\s*(?:hey\s+|yo\s+|ok\s+)?keith[\s,?!:]", re.IGNORECASE)
+_RELEVANCE_NO_RE = re.compile(
+    r"\b(?:the\s+keith\s+bot|asked\s+keith|keith\s+(?:is|was|does|responds?)\b|programmed\s+keith)",
+    re.IGNORECASE
+)
+
+class TokenBucket:
+    """
+    Async token bucket gating outbound Claude requests.
+
+    The bucket refills continuously at refill_rate tokens/sec up to
+    capacity. A 429 halves the refill rate (multiplicative decrease) and
+    every clean call nudges it back toward the configured rate, so bursts
+    get smoothed into short waits instead of wasted rate-limited round
+    trips that roll back history.
+    """
+
+    def __init__(self, capacity: float, refill_rate: float):
+        self.capacity = capacity
+        self._base_rate = refill_rate
+        self.refill_rate = refill_rate
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, n: float = 1.0) -> None:
+        """Take n tokens, sleeping until the bucket can cover them."""
+        async with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity,
+                self.tokens + (now - self.last_refill) * self.refill_rate
+            )
+            self.last_refill = now
+            if self.tokens < n:
+                await asyncio.sleep((n - self.tokens) / self.refill_rate)
+                # The sleep consumed the refill accrued during it; restamp
+                # so the next caller isn't credited those tokens again.
+                self.last_refill = time.monotonic()
+                self.tokens = 0.0
+            else:
+                self.tokens -= n
+
+    def on_rate_limited(self) -> None:
+        """Multiplicative decrease after a 429 from the API."""
+        self.refill_rate = max(self._base_rate * 0.05, self.refill_rate * 0.5)
+
+    def on_success(self) -> None:
+        """Additive recovery toward the configured rate."""
+        if self.refill_rate < self._base_rate:
+            self.refill_rate = min(
+                self._base_rate,
+                self.refill_rate + self._base_rate * 0.02
+            )
+
+
+# Everything after the "keith" prefix and its trailing punctuation; covers
+# "keith ...", "Keith: ...", "keith, ..." without per-call slicing logic
+_KEITH_PROMPT_RE = re.compile(r"^keith[\s,:!.?-]*(.*)", re.IGNORECASE | re.DOTALL)
+
+class AIMDSemaphore:
+    """
+    Concurrency limiter whose width adapts to API behaviour (AIMD).
+
+    Starts at 4 in-flight calls, grows by one after every 10 clean calls
+    up to 16, and halves (floor 1) on a rate limit. Shrinking below the
+    number of current holders is recorded as debt and paid off as those
+    calls release, so no permit is ever double-counted.
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 1,
+                 maximum: int = 16, growth_every: int = 10):
+        self._sem = asyncio.Semaphore(initial)
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self._growth_every = growth_every
+        self._clean_calls = 0
+        self._debt = 0  # permits to swallow instead of releasing
+
+    async def __aenter__(self) -> "AIMDSemaphore":
+        await self._sem.acquire()
+        return self
+
+    async def __aexit__(self, *exc) -> bool:
+        if self._debt > 0:
+            self._debt -= 1
+        else:
+            self._sem.release()
+        return False
+
+    def on_success(self) -> None:
+        """Additive increase after a clean call."""
+        self._clean_calls += 1
+        if self._clean_calls >= self._growth_every and self.limit < self.maximum:
+            self._clean_calls = 0
+            self.limit += 1
+            self._sem.release()
+
+    def on_backoff(self) -> None:
+        """Multiplicative decrease after a rate limit."""
+        self._clean_calls = 0
+        new_limit = max(self.minimum, self.limit // 2)
+        self._debt += self.limit - new_limit
+        self.limit = new_limit
+
+
+# Sentinel the fused smart-mode call returns when declining to respond
+_GATE_SENTINEL = "[PASS]"
+
+
 class ClaudeHandler:
     """Handles all Claude API interactions with conversation memory."""
-    
+
+    # Max entries in the identical-prompt response cache
+    _RESPONSE_CACHE_MAX = 1000
+    # Max entries in the gate-verdict memo
+    _RELEVANCE_CACHE_MAX = 1024
+
     def __init__(self, api_key: str, model: str, system_prompt: str):
-        self.client = anthropic.Anthropic(api_key=api_key)
+        global anthropic, httpx
+        import anthropic
+        import httpx
+
+        # Persistent HTTP/2 connection pool: back-to-back Claude calls reuse
+        # one socket instead of paying a TLS handshake per cold connection.
+        self.client = anthropic.AsyncAnthropic(
+            api_key=api_key,
+            http_client=httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+                timeout=httpx.Timeout(60.0, connect=5.0)
+            )
+        )
         self.model = model
-        self.relevance_model = Config.RELEVANCE_MODEL
         self.system_prompt = system_prompt
-        self.conversations: dict[int, list[dict]] = defaultdict(list)
-    
+        # System prompt for the fused smart-mode turn: Claude itself judges
+        # relevance and declines with a bare sentinel instead of a separate
+        # Haiku round trip deciding first.
+        self._gated_system_prompt = (
+            system_prompt
+            + "\n\nYou are reading an open channel where not every message"
+              " that mentions you is addressed to you. If this message is not"
+              " actually directed at you or does not call for a reply (for"
+              " example, people talking about you in the third person),"
+              " respond with exactly " + _GATE_SENTINEL
+            + " and nothing else. Otherwise respond normally."
+        )
+        # LRU of per-channel histories: most recently used channels at the
+        # end, so eviction pops from the front when the cap is exceeded.
+        # Each history is a bounded deque so overflow eviction is O(1).
+        # Histories also persist to SQLite; evicted/cold channels reload
+        # lazily, so RAM only ever holds the hot set.
+        self.conversations: OrderedDict[int, deque[dict]] = OrderedDict()
+        self._db = sqlite3.connect(Config.CONVERSATION_DB_PATH, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS conversations ("
+            " channel_id INTEGER NOT NULL,"
+            " seq INTEGER NOT NULL,"
+            " role TEXT NOT NULL,"
+            " content TEXT NOT NULL,"
+            " PRIMARY KEY (channel_id, seq))"
+        )
+        self._db.commit()
+        self._last_access: dict[int, float] = {}
+        # Fingerprint of the recent-context block last injected per channel,
+        # so an unchanged block isn't re-embedded turn after turn.
+        self._last_ctx_hash: dict[int, int] = {}
+        # LRU of digest(conversation state) -> response for repeated
+        # trivial prompts ("keith hi" etc.), avoiding a network round trip.
+        self._response_cache: OrderedDict[bytes, str] = OrderedDict()
+        # LRU of word-normalized message -> gate verdict, so echoed or
+        # repeated mentions reuse Claude's earlier respond/decline call.
+        self._relevance_cache: OrderedDict[str, bool] = OrderedDict()
+        # channel_id -> (digest of last user content, response) for deduping
+        # immediate resubmits of the same prompt (double-clicks, retries)
+        self._last_response: dict[int, tuple[bytes, str]] = {}
+        # channel_id -> system prompt the last API turn was sent with, so
+        # the cache keepalive touches the same prefix (gated and ungated
+        # prompts cache separately)
+        self._last_sys_prompt: dict[int, str] = {}
+        # Fixed user-facing messages for known API failures; anything not
+        # listed surfaces str(e). Built here because anthropic imports lazily.
+        self._error_map: dict[type, str] = {
+            anthropic.RateLimitError: "Rate limit exceeded",
+            anthropic.AuthenticationError: "Authentication error",
+        }
+        # Adaptive cap on concurrently streaming responses
+        self._concurrency = AIMDSemaphore()
+        # Client-side request gate: smooths bursts below the API rate limit
+        self._bucket = TokenBucket(
+            capacity=10.0,
+            refill_rate=Config.CLAUDE_REQUESTS_PER_MINUTE / 60.0
+        )
+
+    async def touch_cache(self, channel_id: int) -> None:
+        """
+        Keep the Anthropic prompt cache warm for a channel by issuing a
+        1-token request against the same cached prefix. The cache TTL is
+        ~5 minutes; a cheap touch near expiry avoids paying cache_creation
+        on the next real turn in an active channel.
+        """
+        history = self.conversations.get(channel_id)
+        if not history:
+            return
+
+        # Mirror process_prompt's block layout so the prefix bytes match:
+        # cache breakpoint on the last stable turn, then a throwaway turn.
+        messages = list(history)
+        last = messages[-1]
+        if isinstance(last["content"], str):
+            messages[-1] = {
+                "role": last["role"],
+                "content": [{
+                    "type": "text",
+                    "text": last["content"],
+                    "cache_control": {"type": "ephemeral"}
+                }]
+            }
+        messages.append({"role": "user", "content": "."})
+
+        await self._bucket.acquire()
+        try:
+            await self.client.messages.create(
+                model=self.model,
+                max_tokens=1,
+                system=[{
+                    "type": "text",
+                    "text": self._last_sys_prompt.get(channel_id, self.system_prompt),
+                    "cache_control": {"type": "ephemeral"}
+                }],
+                messages=messages
+            )
+        except Exception as e:
+            # Purely opportunistic - the next real call just recreates the cache
+            logger.debug("Prompt-cache keepalive failed for %s: %s", channel_id, e)
+
+    def _restore_ctx_hash(self, channel_id: int, prev_ctx_hash: int | None) -> None:
+        """Roll the context fingerprint back after a turn that never made
+        it into the conversation (error, empty response, gate decline)."""
+        if prev_ctx_hash is None:
+            self._last_ctx_hash.pop(channel_id, None)
+        else:
+            self._last_ctx_hash[channel_id] = prev_ctx_hash
+
     def clear_history(self, channel_id: int) -> None:
         """Clear conversation history for a channel."""
-        self.conversations[channel_id] = []
-    
+        self.conversations.pop(channel_id, None)
+        self._last_access.pop(channel_id, None)
+        self._last_ctx_hash.pop(channel_id, None)
+        self._last_response.pop(channel_id, None)
+        self._last_sys_prompt.pop(channel_id, None)
+        self._db.execute("DELETE FROM conversations WHERE channel_id=?", (channel_id,))
+        self._db.commit()
+
     def clear_all_history(self) -> None:
         """Clear all conversation history."""
         self.conversations.clear()
-    
-    def _trim_history(self, channel_id: int) -> None:
-        """Trim conversation history to max length."""
-        history = self.conversations[channel_id]
-        if len(history) > Config.MAX_CONVERSATION_HISTORY * 2:
-            self.conversations[channel_id] = history[-(Config.MAX_CONVERSATION_HISTORY * 2):]
-    
-    def check_relevance(
-        self, 
-        message_content: str, 
-        author_name: str,
-        recent_context: list[dict] | None = None
-    ) -> tuple[bool, str | None]:
+        self._last_access.clear()
+        self._last_ctx_hash.clear()
+        self._last_response.clear()
+        self._db.execute("DELETE FROM conversations")
+        self._db.commit()
+
+    def _load_history(self, channel_id: int) -> deque[dict]:
+        """Load a channel's persisted history (newest maxlen turns)."""
+        maxlen = Config.MAX_CONVERSATION_HISTORY * 2
+        rows = self._db.execute(
+            "SELECT role, content FROM conversations"
+            " WHERE channel_id=? ORDER BY seq DESC LIMIT ?",
+            (channel_id, maxlen)
+        ).fetchall()
+        return deque(
+            ({"role": role, "content": content} for role, content in reversed(rows)),
+            maxlen=maxlen
+        )
+
+    def _persist_turns(self, channel_id: int, turns: list[dict]) -> None:
+        """Append completed turns to the database, trimming old rows."""
+        maxlen = Config.MAX_CONVERSATION_HISTORY * 2
+        seq = self._db.execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM conversations WHERE channel_id=?",
+            (channel_id,)
+        ).fetchone()[0]
+        for turn in turns:
+            seq += 1
+            self._db.execute(
+                "INSERT INTO conversations (channel_id, seq, role, content)"
+                " VALUES (?, ?, ?, ?)",
+                (channel_id, seq, turn["role"], turn["content"])
+            )
+        self._db.execute(
+            "DELETE FROM conversations WHERE channel_id=? AND seq<=?",
+            (channel_id, seq - maxlen)
+        )
+        self._db.commit()
+
+    def _touch_channel(self, channel_id: int) -> deque[dict]:
         """
-        Check if a message mentioning Keith is relevant for Keith to respond to.
-        Uses a fast model (Haiku) to minimize latency and cost.
-        Returns (should_respond, error).
+        Mark a channel as recently used and return its history, evicting
+        the least recently used / stale channels if over budget.
         """
-        # Build context for the relevance check
-        context_text = ""
-        if recent_context:
-            context_text = "Recent messages:\n" + "\n".join(
-                f"  {msg['author']}: {msg['content']}" 
-                for msg in recent_context[-5:]  # Only last 5 for relevance check
-            ) + "\n\n"
-        
-        prompt = f"""{context_text}New message from {author_name}: "{message_content}"
+        now = time.time()
+        history = self.conversations.get(channel_id)
+        if history is None:
+            history = self._load_history(channel_id)
+            self.conversations[channel_id] = history
+        self.conversations.move_to_end(channel_id)
+        self._last_access[channel_id] = now
 
-Keith is an AI assistant bot in this Discord server. Should Keith respond to this message?
-
-Respond YES if ANY of these are true:
-- The message contains a question and mentions Keith
-- Someone is asking Keith for advice, help, or his opinion
-- The message is conversational and directed AT Keith (uses "you/your" when talking about Keith)
-- Someone is joking with Keith, roasting him, complimenting him, or bantering with him
-- Keith's name appears with casual addresses like "hey", "yo", "bro", etc.
-- The message seems like it wants a reaction or response from Keith
-- Someone is telling Keith something about himself (e.g., "keith you're crazy", "keith your swag is unmatched")
+        # Drop channels idle past the TTL (oldest first, so stop at the
+        # first live one).
+        while self.conversations:
+            oldest_id = next(iter(self.conversations))
+            if oldest_id == channel_id:
+                break
+            if now - self._last_access.get(oldest_id, now) < Config.CONVERSATION_TTL_SECONDS:
+                break
+            del self.conversations[oldest_id]
+            self._last_access.pop(oldest_id, None)
 
-Respond NO only if:
-- Someone is explaining technical details about how Keith works as a bot (e.g., "the keith bot uses Claude API", "I programmed keith to detect...")
-- Someone is describing Keith's capabilities or features to another person (e.g., "keith can answer questions", "the bot has a purge command")
-- Keith is mentioned purely as a reference in conversation with others, not directed at him
+        # Enforce the channel-count cap
+        while len(self.conversations) > Config.MAX_CONVERSATION_CHANNELS:
+            evicted_id, _ = self.conversations.popitem(last=False)
+            self._last_access.pop(evicted_id, None)
 
-Key insight: If someone uses "you" or "your" when mentioning Keith, they're talking TO him, not ABOUT him. When in doubt, say YES.
+        return history
 
-Reply with only YES or NO."""
 
-        try:
-            response = self.client.messages.create(
-                model=self.relevance_model,
-                max_tokens=10,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            if response.content and len(response.content) > 0:
-                answer = response.content[0].text.strip().upper()
-                return answer.startswith("YES"), None
-            return False, "Empty response"
-            
-        except Exception as e:
-            return False, str(e)
-    
-    def process_prompt(
-        self, 
-        channel_id: int, 
-        user_name: str, 
+    async def process_prompt(
+        self,
+        channel_id: int,
+        user_name: str,
         prompt: str,
-        recent_context: list[dict] | None = None
+        recent_context: list[dict] | None = None,
+        on_delta: Callable[[str], None] | None = None,
+        relevance_gate: bool = False
     ) -> tuple[str | None, str | None]:
-        """Process a user prompt and return Claude's response (synchronous)."""
-        
-        # Build the user message with optional channel context
+        """
+        Process a user prompt and return Claude's response.
+
+        The response is streamed; each text fragment is passed to on_delta
+        as it arrives (cached responses are delivered as a single fragment).
+
+        With relevance_gate=True the same turn also decides whether Keith
+        should respond at all: a declined message returns (None, None) and
+        leaves no trace in the conversation history.
+        """
+        # Gate-verdict memo: a mention Claude already declined (folded to
+        # its word tokens so punctuation/case variants collapse onto one
+        # entry) is dropped without another round trip, and one it already
+        # answered skips the gate instructions entirely.
+        gate_memo_key: str | None = None
+        if relevance_gate:
+            gate_memo_key = " ".join(_WORD_RE.findall(prompt.casefold()))
+            verdict = self._relevance_cache.get(gate_memo_key)
+            if verdict is not None:
+                self._relevance_cache.move_to_end(gate_memo_key)
+                if verdict is False:
+                    return None, None
+                relevance_gate = False
+
+        # Snapshot for rollback: a failed or declined turn never delivered
+        # its context block, so leaving the new hash behind would suppress
+        # the identical block on the retry as "already sent".
+        prev_ctx_hash = self._last_ctx_hash.get(channel_id)
+
+        # Skip re-injecting the context block when it's identical to the one
+        # sent last turn - it's already in the conversation history.
         if recent_context:
-            context_text = "\n".join(
-                f"  [{msg['author']}]: {msg['content']}" 
-                for msg in recent_context
-            )
-            full_content = (
-                f"[Recent channel messages for context]\n{context_text}\n\n"
-                f"[{user_name} asking you]: {prompt}"
-            )
+            ctx_hash = hash(tuple((m["author"], m["content"]) for m in recent_context))
+            if ctx_hash == self._last_ctx_hash.get(channel_id):
+                recent_context = None
+            else:
+                self._last_ctx_hash[channel_id] = ctx_hash
+
+        # Build the user message with optional channel context - one string
+        # builder pass, no intermediate context_text allocation
+        if recent_context:
+            parts = ["[Recent channel messages for context]\n"]
+            parts += (f"  [{msg['author']}]: {msg['content']}\n" for msg in recent_context)
+            parts.append(f"\n[{user_name} asking you]: {prompt}")
+            full_content = "".join(parts)
         else:
             full_content = f"[{user_name}]: {prompt}"
         
-        self.conversations[channel_id].append({
+        # Client-side dedupe: an immediately-resubmitted identical prompt
+        # returns the previous answer without a second API call or duplicate
+        # history entries.
+        dedupe_key = hashlib.sha1(full_content.encode()).digest()
+        last = self._last_response.get(channel_id)
+        if last is not None and last[0] == dedupe_key:
+            if on_delta is not None:
+                on_delta(last[1])
+            return last[1], None
+
+        history = self._touch_channel(channel_id)
+        history.append({
             "role": "user",
             "content": full_content
         })
-        
-        self._trim_history(channel_id)
-        
+
+        # Serve repeated trivial prompts from a local LRU instead of the API.
+        # Context-bearing or long prompts are effectively unique, so skip them.
+        cache_key = None
+        if not relevance_gate and recent_context is None and len(prompt) < 200:
+            raw = json.dumps([self.system_prompt, list(history)], sort_keys=True)
+            cache_key = hashlib.blake2b(raw.encode()).digest()
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                self._response_cache.move_to_end(cache_key)
+                assistant_turn = {"role": "assistant", "content": cached}
+                history.append(assistant_turn)
+                self._persist_turns(channel_id, [history[-2], assistant_turn])
+                if on_delta is not None:
+                    on_delta(cached)
+                return cached, None
+
+        messages = list(history)
+        # Mark the conversation prefix (everything before this turn) as
+        # cacheable so multi-turn channels reuse the server-side prompt
+        # cache instead of re-processing the same tokens every call.
+        # History stays stored as plain strings; blocks are built here only.
+        if len(messages) > 1:
+            prefix = messages[-2]
+            messages[-2] = {
+                "role": prefix["role"],
+                "content": [{
+                    "type": "text",
+                    "text": prefix["content"],
+                    "cache_control": {"type": "ephemeral"}
+                }]
+            }
+
+        await self._bucket.acquire()
+
         try:
-            response = self.client.messages.create(
+            fragments: list[str] = []
+            # Gate mode holds fragments back until the decline sentinel has
+            # been ruled out, so a declined turn streams nothing to the GUI.
+            held = ""
+            gate_open = not relevance_gate
+            system_text = (self._gated_system_prompt if relevance_gate
+                           else self.system_prompt)
+            async with self._concurrency, self.client.messages.stream(
                 model=self.model,
                 max_tokens=Config.MAX_TOKENS,
-                system=self.system_prompt,
-                messages=self.conversations[channel_id]
-            )
-            
-            if response.content and len(response.content) > 0:
-                response_text = response.content[0].text
-                self.conversations[channel_id].append({
-                    "role": "assistant",
-                    "content": response_text
-                })
+                system=[{
+                    "type": "text",
+                    "text": system_text,
+                    "cache_control": {"type": "ephemeral"}
+                }],
+                messages=messages
+            ) as stream:
+                async for text in stream.text_stream:
+                    fragments.append(text)
+                    if on_delta is None:
+                        continue
+                    if gate_open:
+                        on_delta(text)
+                        continue
+                    held += text
+                    head = held.lstrip()
+                    if head.startswith(_GATE_SENTINEL):
+                        continue  # declined - swallow the rest
+                    if _GATE_SENTINEL.startswith(head):
+                        continue  # could still turn into the sentinel
+                    gate_open = True
+                    on_delta(held)
+
+            response_text = "".join(fragments)
+            if relevance_gate and response_text.lstrip().startswith(_GATE_SENTINEL):
+                # Claude judged the message not addressed to Keith: undo the
+                # turn as if it never happened.
+                history.pop()
+                self._restore_ctx_hash(channel_id, prev_ctx_hash)
+                if gate_memo_key is not None:
+                    self._relevance_cache[gate_memo_key] = False
+                    while len(self._relevance_cache) > self._RELEVANCE_CACHE_MAX:
+                        self._relevance_cache.popitem(last=False)
+                return None, None
+            if not gate_open and on_delta is not None and held:
+                on_delta(held)  # short reply that merely resembled the sentinel
+            if response_text:
+                assistant_turn = {"role": "assistant", "content": response_text}
+                history.append(assistant_turn)
+                self._persist_turns(
+                    channel_id,
+                    [{"role": "user", "content": full_content}, assistant_turn]
+                )
+                if cache_key is not None:
+                    self._response_cache[cache_key] = response_text
+                    while len(self._response_cache) > self._RESPONSE_CACHE_MAX:
+                        self._response_cache.popitem(last=False)
+                self._last_response[channel_id] = (dedupe_key, response_text)
+                self._last_sys_prompt[channel_id] = system_text
+                if gate_memo_key is not None:
+                    self._relevance_cache[gate_memo_key] = True
+                    while len(self._relevance_cache) > self._RELEVANCE_CACHE_MAX:
+                        self._relevance_cache.popitem(last=False)
+                self._bucket.on_success()
+                self._concurrency.on_success()
                 return response_text, None
             else:
-                self.conversations[channel_id].pop()
+                history.pop()
+                self._restore_ctx_hash(channel_id, prev_ctx_hash)
                 return None, "Empty response from Claude"
                 
-        except anthropic.RateLimitError:
-            self.conversations[channel_id].pop()
-            return None, "Rate limit exceeded"
-        except anthropic.AuthenticationError:
-            self.conversations[channel_id].pop()
-            return None, "Authentication error"
         except Exception as e:
-            self.conversations[channel_id].pop()
-            return None, str(e)
+            if isinstance(e, anthropic.RateLimitError):
+                self._bucket.on_rate_limited()
+                self._concurrency.on_backoff()
+            history.pop()
+            self._restore_ctx_hash(channel_id, prev_ctx_hash)
+            return None, self._error_map.get(type(e), str(e))
 
 
 # =============================================================================
 # Discord Bot
 # =============================================================================
 
+# Commands that clear Keith's conversation memory
+_CLEAR_COMMANDS: frozenset[str] = frozenset(("keith clear", "keith reset", "keith forget"))
+
+# Words suggesting a prompt refers back to earlier chat and needs context
+_CONTEXT_WORDS: frozenset[str] = frozenset((
+    "this", "that", "they", "them", "it", "he", "she",
+    "above", "earlier", "previous", "before"
+))
+
+
 class KeithBot(discord.Client):
     """The Discord bot client."""
-    
+
     def __init__(self, gui: 'KeithGUI'):
         intents = discord.Intents.default()
         intents.message_content = True
@@ -263,9 +703,11 @@ class KeithBot(discord.Client):
             Config.CLAUDE_MODEL,
             Config.SYSTEM_PROMPT
         )
-        self._message_queue: queue.Queue = queue.Queue()
-        self._action_queue: queue.Queue = queue.Queue()  # For actions like voice moves
+        self._message_queue: asyncio.Queue = asyncio.Queue()
+        self._action_queue: asyncio.Queue = asyncio.Queue()  # For actions like voice moves
         self._ready = False
+        self._channel_cache: list[tuple[int, str, str]] | None = None
+        self._dispatch_cache: tuple[str, dict] | None = None  # (prefix, token -> handler)
         self.smart_detection = False  # Toggle for AI-based relevance detection
         self.super_server_active = False  # Toggle for Super Server mode
         self._super_server_voice_client: discord.VoiceClient | None = None
@@ -276,11 +718,41 @@ class KeithBot(discord.Client):
         self._stalker_voice_client: discord.VoiceClient | None = None
         self._stalker_audio_start_time: float | None = None  # When current playback started
         self._stalker_audio_offset: float = 0.0  # Offset in seconds for resume
-    
+        self._stalker_audio_duration: float = 60.0  # Fallback dd.mp3 duration
+        self._tomato_pcm: bytes | None = None  # tomato.mp3 decoded to raw PCM
+        self._keepalive_tasks: dict[int, asyncio.Task] = {}  # per-channel cache keepalive
+
     async def setup_hook(self) -> None:
         """Start background tasks."""
         self.loop.create_task(self._process_outgoing_queue())
         self.loop.create_task(self._process_action_queue())
+        self.loop.create_task(self._preload_tomato_audio())
+
+    async def _preload_tomato_audio(self) -> None:
+        """
+        Decode tomato.mp3 to raw PCM once at startup so each Tomato Town
+        playback skips the FFmpeg subprocess spawn and disk read.
+        """
+        audio_path = Path(__file__).parent / "audio" / "tomato.mp3"
+        if not audio_path.exists():
+            return
+        ffmpeg = "ffmpeg"
+        if Config.FFMPEG_PATH:
+            ffmpeg = os.path.join(Config.FFMPEG_PATH, "ffmpeg.exe")
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                ffmpeg, "-i", str(audio_path),
+                "-f", "s16le", "-ar", "48000", "-ac", "2",
+                "-loglevel", "quiet", "pipe:1",
+                stdout=asyncio.subprocess.PIPE
+            )
+            pcm, _ = await proc.communicate()
+            if proc.returncode == 0 and pcm:
+                self._tomato_pcm = pcm
+                logger.info("Preloaded tomato.mp3 (%d bytes PCM)", len(pcm))
+        except Exception as e:
+            # Playback falls back to FFmpegPCMAudio when preload fails
+            logger.warning("Could not preload tomato.mp3: %s", e)
     
     async def on_ready(self) -> None:
         """Called when connected to Discord."""
@@ -288,42 +760,90 @@ class KeithBot(discord.Client):
         self.gui.set_status("connected", f"Connected as {self.user.name}")
         self.gui.populate_channels(self.get_all_channels())
         self.gui.log_system(f"Logged in as {self.user.name}#{self.user.discriminator}")
-        logger.info(f"Logged in as {self.user}")
+        logger.info("Logged in as %s", self.user)
     
     async def on_disconnect(self) -> None:
         """Called when disconnected."""
         self._ready = False
         self.gui.set_status("disconnected", "Disconnected")
-    
+
+    def _schedule_keepalive(self, channel_id: int) -> None:
+        """(Re)arm the prompt-cache keepalive for a channel after a response."""
+        if Config.CACHE_KEEPALIVE_SECONDS <= 0:
+            return
+        prior = self._keepalive_tasks.get(channel_id)
+        if prior is not None and not prior.done():
+            prior.cancel()
+        self._keepalive_tasks[channel_id] = self.loop.create_task(
+            self._keepalive_after(Config.CACHE_KEEPALIVE_SECONDS, channel_id)
+        )
+
+    async def _keepalive_after(self, delay: float, channel_id: int) -> None:
+        await asyncio.sleep(delay)
+        await self.claude.touch_cache(channel_id)
+
+    def _command_dispatch(self, prefix: str) -> dict:
+        """First-token -> handler table, rebuilt only when the prefix changes."""
+        cached = self._dispatch_cache
+        if cached is not None and cached[0] == prefix:
+            return cached[1]
+        table = {
+            f"{prefix}help": self._handle_help,
+            f"{prefix}purge": self._handle_purge,
+        }
+        self._dispatch_cache = (prefix, table)
+        return table
+
     async def on_message(self, message: discord.Message) -> None:
         """Handle incoming messages."""
         if message.author == self.user:
             return
-        
-        content_lower = message.content.lower().strip()
-        
+
+        content = message.content
+        if not content:
+            return  # Attachment/embed-only messages carry no command
+        prefix = self.gui.get_prefix().lower()
+
+        # One-byte pre-filter: in classic mode every command starts with
+        # 'k', 'p' or the prefix character, so most chatter bails before
+        # the slicing below. Smart mode scans the whole message anyway.
+        if not self.smart_detection:
+            first = content[0].lower()
+            if (first != "k" and first != "p" and first != prefix[0]
+                    and not first.isspace()):
+                return
+
+        # Fast path: most messages aren't for us. Check just the first few
+        # characters before paying for a full-message .lower() allocation.
+        head = content[:8].lower().strip()
+        if not (head.startswith("keith")
+                or head.startswith(prefix)
+                or head.startswith("ping <@")):
+            # Smart detection can trigger on "keith" anywhere in the message,
+            # so that mode still needs one full scan.
+            if not (self.smart_detection and "keith" in content.lower()):
+                return
+
+        content_stripped = content.strip()
+        content_lower = content_stripped.lower()
+
         # Check for clear history command
-        if content_lower in ["keith clear", "keith reset", "keith forget"]:
+        if content_lower in _CLEAR_COMMANDS:
             self.claude.clear_history(message.channel.id)
             await message.channel.send("Conversation history cleared! Starting fresh.")
             self.gui.log_system(f"[#{message.channel.name}] History cleared by {message.author.display_name}")
             self.gui.clear_chat_log()
             return
-        
-        # Get the command prefix from GUI
-        prefix = self.gui.get_prefix().lower()
-        
-        # Check for help command
-        if content_lower.startswith(f"{prefix}help"):
-            await self._handle_help(message)
-            return
-        
-        # Check for purge command
-        if content_lower.startswith(f"{prefix}purge"):
-            await self._handle_purge(message)
+
+        # Prefixed commands dispatch on the first whitespace-delimited token:
+        # one dict lookup instead of a startswith scan per command.
+        first_token = content_lower.partition(" ")[0]
+        handler = self._command_dispatch(prefix).get(first_token)
+        if handler is not None:
+            await handler(message)
             return
-        
-        # Check for ping command
+
+        # Check for ping command (needs more than the first token to match)
         if content_lower.startswith("ping <@"):
             await self._handle_spam_ping(message)
             return
@@ -335,7 +855,7 @@ class KeithBot(discord.Client):
         else:
             # Classic mode: only respond if message starts with "keith"
             if content_lower.startswith("keith"):
-                await self._handle_keith(message)
+                await self._handle_keith(message, content_stripped)
     
     async def on_voice_state_update(
         self, 
@@ -428,10 +948,7 @@ class KeithBot(discord.Client):
         self.gui.log_console("[Stalker] Keith disconnected - waiting for target to rejoin...", "info")
     
     def _get_audio_duration(self) -> float:
-        """Get the duration of dd.mp3 in seconds (cached)."""
-        if not hasattr(self, '_stalker_audio_duration'):
-            # Default to 60 seconds if we can't determine duration
-            self._stalker_audio_duration = 60.0
+        """Get the duration of dd.mp3 in seconds."""
         return self._stalker_audio_duration
     
     def _play_stalker_audio(self, seek_to: float = 0.0) -> None:
@@ -451,7 +968,7 @@ class KeithBot(discord.Client):
         
         def after_playback(error):
             if error:
-                logger.error(f"Stalker playback error: {error}")
+                logger.error("Stalker playback error: %s", error)
             # Reset offset and start time when track finishes naturally (for clean loop)
             self._stalker_audio_offset = 0.0
             self._stalker_audio_start_time = None
@@ -526,97 +1043,137 @@ class KeithBot(discord.Client):
         self.gui.log_console("[Stalker] Mode deactivated", "success")
     
     async def _handle_keith_smart(self, message: discord.Message) -> None:
-        """Handle messages mentioning Keith with AI relevance check."""
-        channel_name = getattr(message.channel, 'name', 'DM')
-        
-        # Fetch recent context for relevance check
-        recent_context = await self._get_recent_messages(message)
-        
-        # Run relevance check in executor to not block
-        loop = asyncio.get_event_loop()
-        should_respond, error = await loop.run_in_executor(
-            None,
-            self.claude.check_relevance,
-            message.content,
-            message.author.display_name,
-            recent_context
-        )
-        
-        if error:
-            self.gui.log_console(f"[#{channel_name}] Relevance check error: {error}", "error")
-            return
-        
-        if not should_respond:
-            self.gui.log_console(f"[#{channel_name}] Skipped (not relevant): {message.content[:50]}...", "info")
+        """
+        Handle messages mentioning Keith (smart mode). A single fused Claude
+        turn both decides relevance and produces the reply, instead of a
+        separate Haiku round trip followed by the response call.
+        """
+        # Bind the hot attributes once - display_name walks nickname
+        # resolution and channel.name is behind a getattr on every use.
+        channel = message.channel
+        channel_name = getattr(channel, 'name', 'DM')
+        author_name = message.author.display_name
+        content = message.content
+
+        # Unambiguous direct addresses ("hey keith, ...") skip the gate.
+        # The anchored YES match outranks the fast-reject below: "keith is
+        # this a bug?" is a direct question even though it matches the
+        # third-person patterns, and the baseline rule is to answer when
+        # in doubt.
+        gated = not _RELEVANCE_YES_RE.match(content)
+
+        # Clear third-person talk about the bot never reaches the API
+        if gated and _RELEVANCE_NO_RE.search(content):
+            if Config.VERBOSE_CONSOLE:
+                self.gui.log_console(f"[#{channel_name}] Skipped (not relevant): {content[:50]}...", "info")
             return
-        
-        # It's relevant - proceed with response using full message as prompt
-        self.gui.log_console(f"[#{channel_name}] Detected relevant mention", "success")
-        
-        # Log recent context to memory panel first (if any)
-        if recent_context:
-            self.gui.log_context(channel_name, recent_context)
-        
-        # Log the user's message
-        self.gui.log_chat(f"[#{channel_name}] {message.author.display_name}: {message.content}", "user")
-        
-        async with message.channel.typing():
-            response, error = await loop.run_in_executor(
-                None,
-                self.claude.process_prompt,
-                message.channel.id,
-                message.author.display_name,
-                message.content,  # Use full message as prompt
-                recent_context
+
+        # Start the context fetch now and await it under the typing
+        # indicator, so the history round trip overlaps the typing dispatch.
+        ctx_task = asyncio.create_task(self._get_recent_messages(message))
+        recent_context: list[dict] | None = None
+
+        # Nothing hits the memory panel until the first response fragment
+        # arrives, so declined messages leave no trace there.
+        streamed = False
+
+        def on_delta(text: str) -> None:
+            nonlocal streamed
+            if not streamed:
+                if recent_context:
+                    self.gui.log_context(channel_name, recent_context)
+                self.gui.log_chat(f"[#{channel_name}] {author_name}: {content}", "user")
+                self.gui.log_memory_stream_start(channel_name)
+                streamed = True
+            self.gui.log_memory_delta(text)
+
+        async with channel.typing():
+            recent_context = await ctx_task
+            response, error = await self.claude.process_prompt(
+                channel.id,
+                author_name,
+                content,  # Use full message as prompt
+                recent_context,
+                on_delta=on_delta,
+                relevance_gate=gated
             )
-        
+        if streamed:
+            self.gui.log_memory_stream_end()
+
         if error:
-            await message.channel.send(f"Sorry, an error occurred: {error}")
+            await channel.send(f"Sorry, an error occurred: {error}")
             self.gui.log_chat(f"[#{channel_name}] Error: {error}", "error")
         elif response:
-            await self._send_long_message(message.channel, response)
-            self.gui.log_chat(f"[#{channel_name}] Keith: {response}", "keith")
-        else:
-            await message.channel.send("I received an empty response.")
+            await self._send_long_message(channel, response)
+            self._schedule_keepalive(channel.id)
+        elif Config.VERBOSE_CONSOLE:
+            # Gate declined: Claude judged the mention not addressed to Keith
+            self.gui.log_console(f"[#{channel_name}] Skipped (not relevant): {content[:50]}...", "info")
     
-    async def _handle_keith(self, message: discord.Message) -> None:
+    async def _handle_keith(self, message: discord.Message, content_stripped: str) -> None:
         """Handle the Keith AI command (classic mode - starts with 'Keith')."""
-        prompt = message.content[5:].strip()
+        # on_message already stripped the content and verified the "keith"
+        # prefix; the regex drops the prefix plus any trailing punctuation
+        # ("keith,", "Keith:") in one pass over message.content.
+        match = _KEITH_PROMPT_RE.match(content_stripped)
+        prompt = match.group(1) if match else ""
         if not prompt:
             return
         
-        channel_name = getattr(message.channel, 'name', 'DM')
-        
-        # Fetch recent context
-        recent_context = await self._get_recent_messages(message)
-        
-        # Log recent context to memory panel first (if any)
-        if recent_context:
-            self.gui.log_context(channel_name, recent_context)
-        
-        # Log the user's actual question
-        self.gui.log_chat(f"[#{channel_name}] {message.author.display_name}: {prompt}", "user")
-        
-        async with message.channel.typing():
-            # Run Claude in executor to not block
-            loop = asyncio.get_event_loop()
-            response, error = await loop.run_in_executor(
-                None,
-                self.claude.process_prompt,
-                message.channel.id,
-                message.author.display_name,
+        channel = message.channel
+        channel_name = getattr(channel, 'name', 'DM')
+        author_name = message.author.display_name
+
+        # Short prompts with no back-references ("keith what's 2+2") don't
+        # need channel history - skip the Discord fetch and the extra tokens.
+        if len(prompt) < 40 and not _CONTEXT_WORDS.intersection(prompt.lower().split()):
+            ctx_task = None
+        else:
+            # Fetch in the background so the round trip overlaps the
+            # typing-indicator dispatch below.
+            ctx_task = asyncio.create_task(self._get_recent_messages(message))
+        recent_context: list[dict] | None = None
+
+        # Stream fragments into the memory panel; open the line lazily so
+        # errors never leave an empty "Keith: " prefix behind.
+        streamed = False
+
+        def on_delta(text: str) -> None:
+            nonlocal streamed
+            if not streamed:
+                self.gui.log_memory_stream_start(channel_name)
+                streamed = True
+            self.gui.log_memory_delta(text)
+
+        async with channel.typing():
+            if ctx_task is not None:
+                recent_context = await ctx_task
+
+            # Log recent context to memory panel first (if any)
+            if recent_context:
+                self.gui.log_context(channel_name, recent_context)
+
+            # Log the user's actual question
+            self.gui.log_chat(f"[#{channel_name}] {author_name}: {prompt}", "user")
+
+            response, error = await self.claude.process_prompt(
+                channel.id,
+                author_name,
                 prompt,
-                recent_context
+                recent_context,
+                on_delta=on_delta
             )
-        
+        if streamed:
+            self.gui.log_memory_stream_end()
+
         if error:
-            await message.channel.send(f"Sorry, an error occurred: {error}")
+            await channel.send(f"Sorry, an error occurred: {error}")
             self.gui.log_chat(f"[#{channel_name}] Error: {error}", "error")
         elif response:
-            await self._send_long_message(message.channel, response)
-            self.gui.log_chat(f"[#{channel_name}] Keith: {response}", "keith")
+            await self._send_long_message(channel, response)
+            self._schedule_keepalive(channel.id)
         else:
-            await message.channel.send("I received an empty response.")
+            await channel.send("I received an empty response.")
     
     async def _handle_help(self, message: discord.Message) -> None:
         """Handle the help command to list available commands."""
@@ -667,17 +1224,17 @@ class KeithBot(discord.Client):
             return
         
         try:
-            # Delete the command message first, then purge
-            # purge() will delete `count` messages (not including the command since we delete it separately)
-            await message.delete()
-            deleted = await message.channel.purge(limit=count)
-            
+            # Let purge's bulk delete sweep up the command message as part of
+            # the same batch instead of spending a separate REST call on it.
+            deleted = await message.channel.purge(limit=count + 1)
+            purged = max(len(deleted) - 1, 0)  # Don't count the command itself
+
             # Send confirmation (will auto-delete after 3 seconds)
-            confirm_msg = await message.channel.send(f"Purged {len(deleted)} messages.")
+            confirm_msg = await message.channel.send(f"Purged {purged} messages.")
             await asyncio.sleep(3)
             await confirm_msg.delete()
-            
-            self.gui.log_console(f"[#{channel_name}] Purged {len(deleted)} messages (requested by {message.author.display_name})", "warning")
+
+            self.gui.log_console(f"[#{channel_name}] Purged {purged} messages (requested by {message.author.display_name})", "warning")
             
         except discord.Forbidden:
             await message.channel.send("I don't have permission to delete messages.")
@@ -692,8 +1249,7 @@ class KeithBot(discord.Client):
         
         # Extract the user mention from the message
         # Format: "ping <@userid>" or "ping <@!userid>"
-        import re
-        match = re.search(r'<@!?(\d+)>', message.content)
+        match = _MENTION_RE.search(message.content)
         if not match:
             await message.channel.send("Usage: `ping <@user>`")
             return
@@ -703,28 +1259,44 @@ class KeithBot(discord.Client):
         # Get ping count from GUI
         ping_count = self.gui.get_spam_ping_count()
         
-        # Delete the command message
-        try:
-            await message.delete()
-        except discord.Forbidden:
-            pass
-        
+        # Delete the command message in the background so its round trip
+        # overlaps the first ping send instead of preceding it.
+        async def _delete_command() -> None:
+            try:
+                await message.delete()
+            except discord.Forbidden:
+                pass
+
+        delete_cmd_task = asyncio.create_task(_delete_command())
+
         self.gui.log_console(f"[#{channel_name}] Spam pinging {user_mention} {ping_count} times (requested by {message.author.display_name})", "warning")
         
-        # Spam ping
+        # Spam ping. Pipelined: the delete of ping N runs as a background
+        # task while ping N+1 is being sent, instead of serializing
+        # send -> sleep -> delete -> sleep. Sends stay ~0.3s apart so we
+        # don't blow through the channel's send bucket.
+        async def _delete_later(ping_msg: discord.Message) -> None:
+            await asyncio.sleep(0.3)
+            try:
+                await ping_msg.delete()
+            except discord.HTTPException:
+                pass
+
+        delete_tasks: list[asyncio.Task] = []
         for i in range(ping_count):
             try:
                 ping_msg = await message.channel.send(user_mention)
-                await asyncio.sleep(0.3)  # Brief delay
-                await ping_msg.delete()
-                await asyncio.sleep(0.2)  # Brief delay between pings
             except discord.Forbidden:
                 self.gui.log_console(f"[#{channel_name}] Spam ping failed - no permission", "error")
                 break
             except discord.HTTPException as e:
                 self.gui.log_console(f"[#{channel_name}] Spam ping error - {e}", "error")
                 break
-        
+            delete_tasks.append(asyncio.create_task(_delete_later(ping_msg)))
+            await asyncio.sleep(0.3)
+
+        await asyncio.gather(delete_cmd_task, *delete_tasks)
+
         self.gui.log_console(f"[#{channel_name}] Spam ping complete", "success")
     
     async def _get_recent_messages(self, trigger_message: discord.Message) -> list[dict] | None:
@@ -733,85 +1305,211 @@ class KeithBot(discord.Client):
             return None
         
         try:
-            recent = []
+            # Fetch extra headroom so filtered-out bot/empty messages don't
+            # leave us short of RECENT_CHANNEL_MESSAGES items. appendleft
+            # yields oldest-first output without a reverse pass.
+            recent: deque[dict] = deque()
             async for msg in trigger_message.channel.history(
-                limit=Config.RECENT_CHANNEL_MESSAGES + 1,
+                limit=Config.RECENT_CHANNEL_MESSAGES * 2,
                 before=trigger_message
             ):
-                # Skip Keith's own messages and empty messages
-                if msg.author == self.user or not msg.content.strip():
+                content = msg.content
+                # Skip Keith's own messages and empty/whitespace messages
+                # (isspace avoids the throwaway string .strip() would build)
+                if msg.author == self.user or not content or content.isspace():
                     continue
-                # Include all user messages (even ones mentioning Keith that he didn't respond to)
-                recent.append({
+                # Include all user messages (even ones mentioning Keith that he didn't respond to).
+                # str[:500] allocates even when the string is shorter, so only
+                # slice messages that actually exceed the cap.
+                recent.appendleft({
                     "author": msg.author.display_name,
-                    "content": msg.content[:500]
+                    "content": content if len(content) <= 500 else content[:500]
                 })
-            recent.reverse()
-            return recent if recent else None
+                if len(recent) >= Config.RECENT_CHANNEL_MESSAGES:
+                    break
+            return list(recent) if recent else None
         except Exception:
             return None
     
     async def _send_long_message(self, channel, text: str) -> None:
         """Send a message, splitting if necessary."""
-        if len(text) <= Config.DISCORD_MAX_LENGTH:
+        limit = Config.DISCORD_MAX_LENGTH
+        if len(text) <= limit:
             await channel.send(text)
             return
-        
-        parts = []
-        current = ""
-        for paragraph in text.split("\n"):
-            if len(current) + len(paragraph) + 1 <= Config.DISCORD_MAX_LENGTH:
-                current += paragraph + "\n"
-            else:
-                if current:
-                    parts.append(current.strip())
-                if len(paragraph) > Config.DISCORD_MAX_LENGTH:
-                    for i in range(0, len(paragraph), Config.DISCORD_MAX_LENGTH - 10):
-                        parts.append(paragraph[i:i + Config.DISCORD_MAX_LENGTH - 10])
-                    current = ""
-                else:
-                    current = paragraph + "\n"
-        if current:
-            parts.append(current.strip())
-        
+
+        # Two-message responses are the common overflow case: split once
+        # at the last newline that fits and skip the general chunk loop.
+        if len(text) <= 2 * limit:
+            split = text.rfind("\n", 0, limit + 1)
+            if split <= 0:
+                split = limit
+            head = text[:split].strip()
+            tail = text[split:].strip()
+            if len(tail) <= limit:
+                if head:
+                    await channel.send(head)
+                if tail:
+                    await channel.send(tail)
+                return
+
+        # Accumulate lines in a list and join once per chunk, instead of
+        # growing a string line-by-line (O(n^2) in CPython). keepends=True
+        # keeps each line's own newline, so no separators are re-added.
+        parts: list[str] = []
+        buf: list[str] = []
+        buf_len = 0
+
+        def flush() -> None:
+            nonlocal buf, buf_len
+            if buf:
+                parts.append("".join(buf).strip())
+                buf = []
+                buf_len = 0
+
+        for line in text.splitlines(keepends=True):
+            llen = len(line)
+            if buf_len + llen > limit:
+                flush()
+                if llen > limit:
+                    # Hard-split a single oversized line
+                    for i in range(0, llen, limit - 10):
+                        parts.append(line[i:i + limit - 10])
+                    continue
+            buf.append(line)
+            buf_len += llen
+        flush()
+
+        # Sends stay sequential: Discord renders messages in arrival order.
         for part in parts:
             if part:
                 await channel.send(part)
     
     def get_all_channels(self) -> list[tuple[int, str, str]]:
-        """Get all text channels the bot can see."""
+        """Get all text channels the bot can see (cached until guilds/channels change)."""
+        if self._channel_cache is not None:
+            return self._channel_cache
         channels = []
         for guild in self.guilds:
             for channel in guild.text_channels:
                 if channel.permissions_for(guild.me).send_messages:
                     channels.append((channel.id, channel.name, guild.name))
+        self._channel_cache = channels
         return channels
+
+    def _invalidate_channel_cache(self) -> None:
+        """Drop the cached channel list so the next read rebuilds it."""
+        self._channel_cache = None
+
+    async def on_guild_channel_create(self, channel) -> None:
+        self._invalidate_channel_cache()
+
+    async def on_guild_channel_update(self, before, after) -> None:
+        self._invalidate_channel_cache()
+
+    async def on_guild_channel_delete(self, channel) -> None:
+        self._invalidate_channel_cache()
+
+    async def on_guild_role_update(self, before, after) -> None:
+        self._invalidate_channel_cache()
+
+    async def on_guild_join(self, guild) -> None:
+        self._invalidate_channel_cache()
+
+    async def on_guild_remove(self, guild) -> None:
+        self._invalidate_channel_cache()
     
     def queue_message(self, channel_id: int, text: str) -> None:
-        """Queue a message to be sent."""
-        self._message_queue.put((channel_id, text))
-    
+        """Queue a message to be sent (thread-safe, called from the GUI thread)."""
+        # Dispatching a plain loop callback is much cheaper than wrapping
+        # the put in a coroutine with run_coroutine_threadsafe.
+        self.loop.call_soon_threadsafe(self._enqueue_outgoing, channel_id, text)
+
+    def _enqueue_outgoing(self, channel_id: int, text: str) -> None:
+        """Put an outgoing message on the queue, dropping the oldest past the cap."""
+        # Keeps a stalled-worker pileup from growing without bound; the
+        # newest sends win because they reflect current GUI intent.
+        while self._message_queue.qsize() >= Config.OUTGOING_QUEUE_MAX:
+            try:
+                self._message_queue.get_nowait()
+                self._message_queue.task_done()
+            except asyncio.QueueEmpty:
+                break
+            logger.warning("Outgoing queue full; dropped oldest queued message")
+        self._message_queue.put_nowait((channel_id, text))
+
+    # Max queued messages drained per iteration of the outgoing worker
+    OUTGOING_BATCH_SIZE = 32
+
     async def _process_outgoing_queue(self) -> None:
-        """Process outgoing message queue."""
+        """
+        Process outgoing message queue.
+
+        Drains up to OUTGOING_BATCH_SIZE queued messages at once and sends to
+        distinct channels concurrently, while keeping per-channel FIFO order.
+        """
         while True:
+            batch = [await self._message_queue.get()]
+            while len(batch) < self.OUTGOING_BATCH_SIZE:
+                try:
+                    batch.append(self._message_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            # Group by channel so order is preserved within a channel but
+            # sends to different channels overlap.
+            by_channel: dict[int, list[str]] = defaultdict(list)
+            for channel_id, text in batch:
+                by_channel[channel_id].append(text)
+
+            await asyncio.gather(
+                *(self._send_channel_batch(cid, texts) for cid, texts in by_channel.items()),
+                return_exceptions=True
+            )
+
+            for _ in batch:
+                self._message_queue.task_done()
+
+    async def _send_channel_batch(self, channel_id: int, texts: list[str]) -> None:
+        """Send a batch of queued messages to one channel, in order."""
+        channel = self.get_channel(channel_id)
+        if not channel:
+            return
+        channel_name = getattr(channel, 'name', 'Unknown')
+
+        # Coalesce consecutive queued messages into as few sends as fit in
+        # one Discord message, so a burst of pasted lines costs one REST
+        # round trip instead of one per line.
+        limit = Config.DISCORD_MAX_LENGTH
+        merged: list[str] = []
+        buf: list[str] = []
+        buf_len = 0
+        for text in texts:
+            extra = len(text) + (1 if buf else 0)  # +1 joining newline
+            if buf and buf_len + extra > limit:
+                merged.append("\n".join(buf))
+                buf = []
+                buf_len = 0
+                extra = len(text)
+            buf.append(text)
+            buf_len += extra
+        if buf:
+            merged.append("\n".join(buf))
+
+        for text in merged:
             try:
-                channel_id, text = self._message_queue.get_nowait()
-                channel = self.get_channel(channel_id)
-                if channel:
-                    await channel.send(text)
-                    channel_name = getattr(channel, 'name', 'Unknown')
+                await channel.send(text)
+                if Config.VERBOSE_CONSOLE:
                     self.gui.log_chat(f"[#{channel_name}] (Manual) Keith: {text}", "manual")
-                self._message_queue.task_done()
-            except queue.Empty:
-                await asyncio.sleep(0.1)
             except Exception as e:
-                logger.error(f"Error sending queued message: {e}")
-    
+                logger.error("Error sending queued message: %s", e)
+                self.gui.log_chat(f"[#{channel_name}] Failed to send: {e}", "error")
+
     async def _process_action_queue(self) -> None:
         """Process action queue (for voice moves, etc.)."""
         while True:
+            action, args = await self._action_queue.get()
             try:
-                action, args = self._action_queue.get_nowait()
                 if action == "tomato_town":
                     await self._tomato_town()
                 elif action == "super_server_start":
@@ -822,12 +1520,11 @@ class KeithBot(discord.Client):
                     await self._stalker_start(args.get("target_id"))
                 elif action == "stalker_stop":
                     await self._stalker_stop()
-                self._action_queue.task_done()
-            except queue.Empty:
-                await asyncio.sleep(0.1)
             except Exception as e:
-                logger.error(f"Error processing action: {e}")
+                logger.error("Error processing action: %s", e)
                 self.gui.log_console(f"Action error: {e}", "error")
+            finally:
+                self._action_queue.task_done()
     
     async def _tomato_town(self) -> None:
         """
@@ -850,27 +1547,37 @@ class KeithBot(discord.Client):
         # Step 1: Gather everyone to Tomato Town
         self.gui.log_console(f"Gathering everyone to #{target_channel.name}...", "warning")
         
-        moved_count = 0
-        members_to_kick = []  # Track members to kick later
-        
+        members_to_kick: set[discord.Member] = set()  # Track members to kick later
+        members_to_move = []
+
         for guild in self.guilds:
             for voice_channel in guild.voice_channels:
                 if voice_channel.id == Config.GATHER_VOICE_CHANNEL_ID:
                     # Add existing members in target channel to kick list
-                    members_to_kick.extend(voice_channel.members)
+                    members_to_kick.update(voice_channel.members)
                     continue
-                
-                for member in voice_channel.members:
-                    try:
-                        await member.move_to(target_channel)
-                        self.gui.log_console(f"Moved {member.display_name} to #{target_channel.name}", "info")
-                        members_to_kick.append(member)
-                        moved_count += 1
-                    except discord.Forbidden:
-                        self.gui.log_console(f"No permission to move {member.display_name}", "error")
-                    except discord.HTTPException as e:
-                        self.gui.log_console(f"Failed to move {member.display_name}: {e}", "error")
-        
+                members_to_move.extend(voice_channel.members)
+
+        # Move everyone concurrently; cap in-flight requests so discord.py's
+        # rate-limit handling isn't hammered by one burst per member.
+        move_sem = asyncio.Semaphore(10)
+
+        async def _move(member: discord.Member) -> bool:
+            async with move_sem:
+                try:
+                    await member.move_to(target_channel)
+                    self.gui.log_console(f"Moved {member.display_name} to #{target_channel.name}", "info")
+                    members_to_kick.add(member)
+                    return True
+                except discord.Forbidden:
+                    self.gui.log_console(f"No permission to move {member.display_name}", "error")
+                except discord.HTTPException as e:
+                    self.gui.log_console(f"Failed to move {member.display_name}: {e}", "error")
+                return False
+
+        results = await asyncio.gather(*(_move(m) for m in members_to_move))
+        moved_count = sum(results)
+
         self.gui.log_console(f"Gathered {moved_count} users to Tomato Town", "success")
         
         # Step 2: Join the voice channel
@@ -889,8 +1596,8 @@ class KeithBot(discord.Client):
         
         # Step 3: Play tomato.mp3
         audio_path = Path(__file__).parent / "audio" / "tomato.mp3"
-        
-        if not audio_path.exists():
+
+        if self._tomato_pcm is None and not audio_path.exists():
             self.gui.log_console(f"Error: Audio file not found at {audio_path}", "error")
             await voice_client.disconnect()
             return
@@ -902,14 +1609,16 @@ class KeithBot(discord.Client):
         
         def after_playback(error):
             if error:
-                logger.error(f"Playback error: {error}")
-            # Signal that audio is done
-            asyncio.run_coroutine_threadsafe(self._signal_event(audio_done), self.loop)
+                logger.error("Playback error: %s", error)
+            # Signal that audio is done. call_soon_threadsafe is far lighter
+            # than bouncing through a coroutine with run_coroutine_threadsafe.
+            self.loop.call_soon_threadsafe(audio_done.set)
         
         try:
-            # Use custom FFmpeg path if configured
-            ffmpeg_options = {}
-            if Config.FFMPEG_PATH:
+            if self._tomato_pcm is not None:
+                # Preloaded PCM: no FFmpeg spawn, no disk read
+                audio_source = discord.PCMAudio(io.BytesIO(self._tomato_pcm))
+            elif Config.FFMPEG_PATH:
                 ffmpeg_exe = os.path.join(Config.FFMPEG_PATH, "ffmpeg.exe")
                 audio_source = discord.FFmpegPCMAudio(str(audio_path), executable=ffmpeg_exe)
             else:
@@ -927,22 +1636,29 @@ class KeithBot(discord.Client):
         # Step 4: Kick everyone from the voice channel
         self.gui.log_console("Kicking everyone from Tomato Town...", "warning")
         
-        # Refresh the member list (some may have left)
-        target_channel = self.get_channel(Config.GATHER_VOICE_CHANNEL_ID)
+        # The tracked set already covers everyone who was gathered, so no
+        # channel refetch/member re-walk is needed. move_to(None) on someone
+        # who already left just fails quietly into the error log.
+        members_to_kick.discard(self.user)
         kicked_count = 0
-        
-        if target_channel:
-            for member in list(target_channel.members):
-                if member == self.user:
-                    continue  # Don't kick ourselves yet
-                try:
-                    await member.move_to(None)  # Disconnect them
-                    self.gui.log_console(f"Kicked {member.display_name}", "info")
-                    kicked_count += 1
-                except discord.Forbidden:
-                    self.gui.log_console(f"No permission to kick {member.display_name}", "error")
-                except Exception as e:
-                    self.gui.log_console(f"Failed to kick {member.display_name}: {e}", "error")
+
+        if members_to_kick:
+            # Kick concurrently too, reusing the move semaphore so the burst
+            # stays under the per-route rate limit.
+            async def _kick(member: discord.Member) -> bool:
+                async with move_sem:
+                    try:
+                        await member.move_to(None)  # Disconnect them
+                        self.gui.log_console(f"Kicked {member.display_name}", "info")
+                        return True
+                    except discord.Forbidden:
+                        self.gui.log_console(f"No permission to kick {member.display_name}", "error")
+                    except Exception as e:
+                        self.gui.log_console(f"Failed to kick {member.display_name}: {e}", "error")
+                    return False
+
+            kick_results = await asyncio.gather(*(_kick(m) for m in members_to_kick))
+            kicked_count = sum(kick_results)
         
         # Step 5: Leave the voice channel
         if voice_client and voice_client.is_connected():
@@ -951,10 +1667,6 @@ class KeithBot(discord.Client):
         
         self.gui.log_console(f"Tomato Town complete! Kicked {kicked_count} users", "success")
     
-    async def _signal_event(self, event: asyncio.Event) -> None:
-        """Helper to signal an event from a callback."""
-        event.set()
-    
     async def _super_server_start(self) -> None:
         """
         Start Super Server mode:
@@ -965,19 +1677,19 @@ class KeithBot(discord.Client):
         
         if not target_channel:
             self.gui.log_console(f"Error: Super Server channel {Config.SUPER_SERVER_CHANNEL_ID} not found", "error")
-            self.gui.after(0, self.gui._reset_super_server_toggle)
+            self.gui.post(self.gui._reset_super_server_toggle)
             return
         
         if not isinstance(target_channel, discord.VoiceChannel):
             self.gui.log_console(f"Error: Channel {Config.SUPER_SERVER_CHANNEL_ID} is not a voice channel", "error")
-            self.gui.after(0, self.gui._reset_super_server_toggle)
+            self.gui.post(self.gui._reset_super_server_toggle)
             return
         
         # Check if audio file exists
         audio_path = Path(__file__).parent / "audio" / "dd.mp3"
         if not audio_path.exists():
             self.gui.log_console(f"Error: Audio file not found at {audio_path}", "error")
-            self.gui.after(0, self.gui._reset_super_server_toggle)
+            self.gui.post(self.gui._reset_super_server_toggle)
             return
         
         # Join the voice channel
@@ -994,7 +1706,7 @@ class KeithBot(discord.Client):
                     break
         except Exception as e:
             self.gui.log_console(f"Failed to join voice for Super Server: {e}", "error")
-            self.gui.after(0, self.gui._reset_super_server_toggle)
+            self.gui.post(self.gui._reset_super_server_toggle)
             return
         
         self.super_server_active = True
@@ -1011,14 +1723,14 @@ class KeithBot(discord.Client):
         if not self._super_server_voice_client.is_connected():
             self.gui.log_console("Super Server: Voice client disconnected", "warning")
             self.super_server_active = False
-            self.gui.after(0, self.gui._reset_super_server_toggle)
+            self.gui.post(self.gui._reset_super_server_toggle)
             return
         
         audio_path = Path(__file__).parent / "audio" / "dd.mp3"
         
         def after_playback(error):
             if error:
-                logger.error(f"Super Server playback error: {error}")
+                logger.error("Super Server playback error: %s", error)
             # Loop: schedule next play if still active
             if self.super_server_active:
                 asyncio.run_coroutine_threadsafe(
@@ -1037,7 +1749,7 @@ class KeithBot(discord.Client):
         except Exception as e:
             self.gui.log_console(f"Super Server audio error: {e}", "error")
             self.super_server_active = False
-            self.gui.after(0, self.gui._reset_super_server_toggle)
+            self.gui.post(self.gui._reset_super_server_toggle)
     
     async def _schedule_super_server_loop(self) -> None:
         """Schedule the next loop of Super Server audio."""
@@ -1061,8 +1773,8 @@ class KeithBot(discord.Client):
         self.gui.log_console("Super Server deactivated", "success")
     
     def queue_action(self, action: str, args: dict = None) -> None:
-        """Queue an action to be performed."""
-        self._action_queue.put((action, args or {}))
+        """Queue an action to be performed (thread-safe, called from the GUI thread)."""
+        self.loop.call_soon_threadsafe(self._action_queue.put_nowait, (action, args or {}))
 
 
 # =============================================================================
@@ -1109,6 +1821,16 @@ class Theme:
     BTN_SUPER_HOVER = "#8a6bc5"
 
 
+@contextmanager
+def _writable(textbox: ctk.CTkTextbox):
+    """Temporarily enable a read-only textbox for a batch of writes."""
+    textbox.configure(state="normal")
+    try:
+        yield textbox
+    finally:
+        textbox.configure(state="disabled")
+
+
 class KeithGUI(ctk.CTk):
     """Main GUI application for Keith bot with modern redesigned interface."""
     
@@ -1146,14 +1868,33 @@ class KeithGUI(ctk.CTk):
         # Bot reference (set later)
         self.bot: KeithBot | None = None
         self.bot_thread: threading.Thread | None = None
+        self.bot_loop: asyncio.AbstractEventLoop | None = None
         self.channels: list[tuple[int, str, str]] = []
+        self._display_to_id: dict[str, int] = {}  # dropdown label -> channel id
+        self._channels_snapshot: int | None = None  # hash of last populated list
+        self._cached_spam_count = 5  # mirrors the ping-count entry
+        self._cached_prefix = "k!"  # mirrors the prefix entry
         
         # Current view tracking
         self.current_view = "main"
         
         # Build UI
         self._create_widgets()
-        
+
+        # Buffered logging: log_* calls stage (text, tag) segments here and a
+        # flush timer, scheduled only when there is pending output, drains
+        # them - so bursts cost one Tk update per flush instead of per line.
+        self._console_pending: deque[tuple[str, str]] = deque()
+        self._memory_pending: deque[tuple[str, str]] = deque()
+        self._flush_scheduled = False
+        self._ts_cache: tuple[int, str] = (0, "")  # (epoch second, formatted)
+
+        # Cross-thread UI updates: bot threads put callables on this queue
+        # and one pump timer drains them on the Tk thread, instead of each
+        # caller issuing its own after(0, ...) round-trip.
+        self._gui_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.after(50, self._pump_gui_queue)
+
         # Handle window close
         self.protocol("WM_DELETE_WINDOW", self._on_close)
     
@@ -1409,11 +2150,13 @@ class KeithGUI(ctk.CTk):
         self.console_log.grid(row=1, column=0, sticky="nsew", padx=15, pady=(5, 15))
         
         # Console text tags
-        self.console_log._textbox.tag_config("info", foreground=Theme.TEXT_SECONDARY)
-        self.console_log._textbox.tag_config("success", foreground=Theme.SUCCESS)
-        self.console_log._textbox.tag_config("warning", foreground=Theme.WARNING)
-        self.console_log._textbox.tag_config("error", foreground=Theme.ERROR)
-        self.console_log._textbox.tag_config("timestamp", foreground=Theme.TEXT_DIM)
+        for tag, color in self.CONSOLE_TAGS.items():
+            self.console_log._textbox.tag_config(tag, foreground=color)
+
+        # Persistent end mark: inserting at a right-gravity mark skips the
+        # "end" index resolution Tk performs on every insert
+        self.console_log._textbox.mark_set("append", "end-1c")
+        self.console_log._textbox.mark_gravity("append", "right")
         
         # === Right Panel: Memory (AI Conversations) ===
         self.memory_frame = ctk.CTkFrame(
@@ -1477,14 +2220,11 @@ class KeithGUI(ctk.CTk):
         self.memory_log.grid(row=1, column=0, sticky="nsew", padx=15, pady=(5, 15))
         
         # Memory text tags
-        self.memory_log._textbox.tag_config("user", foreground=Theme.PRIMARY)
-        self.memory_log._textbox.tag_config("keith", foreground=Theme.SUCCESS)
-        self.memory_log._textbox.tag_config("manual", foreground=Theme.WARNING)
-        self.memory_log._textbox.tag_config("channel", foreground=Theme.PURPLE)
-        self.memory_log._textbox.tag_config("divider", foreground=Theme.TEXT_DIM)
-        self.memory_log._textbox.tag_config("context_author", foreground=Theme.TEXT_SECONDARY)
-        self.memory_log._textbox.tag_config("context_msg", foreground=Theme.TEXT_DIM)
-        self.memory_log._textbox.tag_config("timestamp", foreground=Theme.TEXT_DIM)
+        for tag, color in self.MEMORY_TAGS.items():
+            self.memory_log._textbox.tag_config(tag, foreground=color)
+
+        self.memory_log._textbox.mark_set("append", "end-1c")
+        self.memory_log._textbox.mark_gravity("append", "right")
     
     def _create_memes_view(self) -> None:
         """Create the memes view with Tomato Town and Super Server controls."""
@@ -1765,6 +2505,10 @@ class KeithGUI(ctk.CTk):
         )
         self.prefix_entry.insert(0, "k!")
         self.prefix_entry.grid(row=1, column=1, sticky="w", padx=20, pady=(0, 10))
+        # Mirror edits into a plain attribute so the bot thread never has
+        # to touch the Tk widget to read the prefix.
+        self.prefix_entry.bind("<KeyRelease>", self._update_prefix_cache)
+        self.prefix_entry.bind("<FocusOut>", self._update_prefix_cache)
         
         # Smart Detection Toggle
         self.smart_label = ctk.CTkLabel(
@@ -1809,6 +2553,10 @@ class KeithGUI(ctk.CTk):
         )
         self.spam_ping_count_entry.insert(0, "5")
         self.spam_ping_count_entry.pack(side="left")
+        # Cache the parsed count on each edit so the bot thread reads a
+        # plain int instead of crossing into Tk mid-command
+        self.spam_ping_count_entry.bind("<KeyRelease>", self._update_spam_count_cache)
+        self.spam_ping_count_entry.bind("<FocusOut>", self._update_spam_count_cache)
         
         self.ping_info = ctk.CTkLabel(
             self.ping_frame,
@@ -1949,15 +2697,40 @@ class KeithGUI(ctk.CTk):
         
         self.current_view = view_name
     
+    # Log-panel tag palettes, defined once at class scope so themes or
+    # subclasses override data instead of re-running a dozen tag_config calls
+    CONSOLE_TAGS = {
+        "info": Theme.TEXT_SECONDARY,
+        "success": Theme.SUCCESS,
+        "warning": Theme.WARNING,
+        "error": Theme.ERROR,
+        "timestamp": Theme.TEXT_DIM
+    }
+    MEMORY_TAGS = {
+        "user": Theme.PRIMARY,
+        "keith": Theme.SUCCESS,
+        "manual": Theme.WARNING,
+        "channel": Theme.PURPLE,
+        "divider": Theme.TEXT_DIM,
+        "context_author": Theme.TEXT_SECONDARY,
+        "context_msg": Theme.TEXT_DIM,
+        "timestamp": Theme.TEXT_DIM
+    }
+
+    # Status -> indicator color, built once instead of per set_status call
+    _STATUS_COLORS = {
+        "connected": Theme.STATUS_CONNECTED,
+        "connecting": Theme.STATUS_CONNECTING,
+        "disconnected": Theme.STATUS_DISCONNECTED,
+        "error": Theme.STATUS_ERROR
+    }
+
     def set_status(self, status: str, text: str) -> None:
-        """Update connection status display."""
-        colors = {
-            "connected": Theme.STATUS_CONNECTED,
-            "connecting": Theme.STATUS_CONNECTING,
-            "disconnected": Theme.STATUS_DISCONNECTED,
-            "error": Theme.STATUS_ERROR
-        }
-        self.status_indicator.configure(text_color=colors.get(status, Theme.TEXT_SECONDARY))
+        """Update connection status display (safe to call from any thread)."""
+        if threading.current_thread() is not threading.main_thread():
+            self._gui_queue.put(lambda: self.set_status(status, text))
+            return
+        self.status_indicator.configure(text_color=self._STATUS_COLORS.get(status, Theme.TEXT_SECONDARY))
         self.status_label.configure(text=text)
         
         if status == "connected":
@@ -1991,36 +2764,178 @@ class KeithGUI(ctk.CTk):
                 self._reset_stalker_mode_toggle()
     
     def populate_channels(self, channels: list[tuple[int, str, str]]) -> None:
-        """Populate channel dropdown."""
+        """Populate channel dropdown (no-op when the channel set is unchanged)."""
+        if threading.current_thread() is not threading.main_thread():
+            self._gui_queue.put(lambda: self.populate_channels(channels))
+            return
+        snapshot = hash(tuple(channels))
+        if snapshot == self._channels_snapshot:
+            return
+        self._channels_snapshot = snapshot
         self.channels = channels
+        self._display_to_id = {
+            f"#{name} ({guild})": cid for cid, name, guild in channels
+        }
         if channels:
-            display_names = [f"#{name} ({guild})" for _, name, guild in channels]
+            display_names = list(self._display_to_id)
             self.channel_dropdown.configure(values=display_names)
             self.channel_dropdown.set(display_names[0])
         else:
             self.channel_dropdown.configure(values=["No channels available"])
     
-    def get_spam_ping_count(self) -> int:
-        """Get the spam ping count from the UI."""
+    def _update_spam_count_cache(self, _event=None) -> None:
+        """Re-parse the ping-count entry into the cached value (Tk thread)."""
         try:
             count = int(self.spam_ping_count_entry.get())
-            return max(1, min(count, 50))  # Clamp between 1 and 50
+            self._cached_spam_count = max(1, min(count, 50))  # Clamp between 1 and 50
         except ValueError:
-            return 5  # Default
+            self._cached_spam_count = 5  # Default
+
+    def get_spam_ping_count(self) -> int:
+        """Get the spam ping count (cached - safe from any thread)."""
+        return self._cached_spam_count
     
-    def get_prefix(self) -> str:
-        """Get the command prefix from the UI."""
+    def _update_prefix_cache(self, _event=None) -> None:
+        """Re-read the prefix entry into the cached value (Tk thread only)."""
         prefix = self.prefix_entry.get().strip()
-        return prefix if prefix else "k!"  # Default to k! if empty
-    
+        self._cached_prefix = prefix if prefix else "k!"  # Default to k! if empty
+
+    def get_prefix(self) -> str:
+        """Get the command prefix (cached; safe to call from any thread)."""
+        return self._cached_prefix
+    
+    def _now_ts(self) -> str:
+        """The complete "[HH:MM:SS] " log segment, re-rendered at most once
+        per second - callers append it as-is with no per-line f-string."""
+        t = int(time.time())
+        if t != self._ts_cache[0]:
+            self._ts_cache = (t, time.strftime("[%H:%M:%S] ", time.localtime(t)))
+        return self._ts_cache[1]
+
     def log_console(self, message: str, level: str = "info") -> None:
-        """Add a message to the console log."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.console_log.configure(state="normal")
-        self.console_log._textbox.insert("end", f"[{timestamp}] ", "timestamp")
-        self.console_log._textbox.insert("end", f"{message}\n", level)
-        self.console_log.configure(state="disabled")
-        self.console_log.see("end")
+        """
+        Add a message to the console log (buffered, flushed on a timer).
+        Identical consecutive lines collapse into one "(xN)" entry at
+        flush time; producers only ever append here, so no thread touches
+        a segment the Tk thread may be draining.
+        """
+        self._console_pending.append((self._now_ts(), "timestamp"))
+        self._console_pending.append((f"{message}\n", level))
+        self._schedule_flush()
+
+    def post(self, fn: Callable[[], None]) -> None:
+        """Queue a callable to run on the Tk thread (thread-safe)."""
+        self._gui_queue.put(fn)
+
+    def _pump_gui_queue(self) -> None:
+        """Drain cross-thread callables on the Tk thread."""
+        while True:
+            try:
+                fn = self._gui_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                fn()
+            except Exception:
+                logger.exception("GUI callback failed")
+        if self._flush_scheduled:
+            self._flush_logs()
+        self.after(50, self._pump_gui_queue)
+
+    def _schedule_flush(self) -> None:
+        """
+        Mark the log buffers dirty. The always-running GUI pump performs
+        the actual flush on the Tk thread, so log_* callers (often the bot
+        thread) only ever touch the thread-safe deques - never Tk itself.
+        """
+        self._flush_scheduled = True
+
+    def _flush_logs(self) -> None:
+        """Drain staged log segments into the textboxes."""
+        # While minimized nobody sees the panels: keep staging in the
+        # (bounded) deques and let the pump retry - restoring the window
+        # flushes everything within one 50ms tick.
+        if self.state() == "iconic":
+            self._trim_pending(self._console_pending)
+            self._trim_pending(self._memory_pending)
+            return
+        self._flush_scheduled = False
+        self._fold_console_dups()
+        self._flush_panel(self.console_log, self._console_pending)
+        self._flush_panel(self.memory_log, self._memory_pending)
+
+    @staticmethod
+    def _trim_pending(pending: deque) -> None:
+        """Bound a staging deque while flushes are suspended (~3 segments
+        per line; lines past the display cap would be trimmed anyway)."""
+        cap = Config.MAX_LOG_LINES * 3
+        while len(pending) > cap:
+            pending.popleft()
+
+    def _fold_console_dups(self) -> None:
+        """Collapse runs of identical pending console lines into a single
+        "(xN)" entry (Tk thread only, just before the panel flush)."""
+        pending = self._console_pending
+        if len(pending) < 4:  # need two timestamp+line pairs to fold
+            return
+        # Drain via popleft so bot-thread appends during the fold are
+        # untouched; folded segments go back in front of them.
+        items: list[tuple[str, str]] = []
+        while pending:
+            items.append(pending.popleft())
+        folded: list[tuple[str, str]] = []
+        held_ts: tuple[str, str] | None = None
+        last_line: tuple[str, str] | None = None
+        last_idx = -1
+        count = 1
+        for text, tag in items:
+            if tag == "timestamp":
+                held_ts = (text, tag)
+                continue
+            if (text, tag) == last_line:
+                count += 1
+                folded[last_idx] = (f"{text[:-1]} (x{count})\n", tag)
+                held_ts = None  # the duplicate's timestamp folds away too
+                continue
+            if held_ts is not None:
+                folded.append(held_ts)
+                held_ts = None
+            folded.append((text, tag))
+            last_line = (text, tag)
+            last_idx = len(folded) - 1
+            count = 1
+        if held_ts is not None:
+            folded.append(held_ts)  # line half of the pair arrives next flush
+        pending.extendleft(reversed(folded))
+
+    @staticmethod
+    def _flush_panel(textbox: ctk.CTkTextbox, pending: deque) -> None:
+        """Insert all pending segments in one writable window, merging
+        consecutive same-tag runs into single inserts."""
+        if not pending:
+            return
+        # Autoscroll only if the user was already at (or near) the bottom,
+        # so scrolling up to read history survives a burst of new lines.
+        at_bottom = textbox._textbox.yview()[1] > 0.98
+        with _writable(textbox):
+            run: list[str] = []
+            run_tag: str | None = None
+            while pending:
+                text, tag = pending.popleft()
+                if tag != run_tag and run:
+                    textbox._textbox.insert("append", "".join(run), run_tag)
+                    run = []
+                run_tag = tag
+                run.append(text)
+            if run:
+                textbox._textbox.insert("append", "".join(run), run_tag)
+            # Ring-buffer cap: drop the oldest lines inside the same writable
+            # window so long sessions don't degrade insert/redraw cost.
+            line_count = int(textbox._textbox.index("end-1c").split(".")[0])
+            if line_count > Config.MAX_LOG_LINES:
+                textbox._textbox.delete("1.0", f"{line_count - Config.MAX_LOG_LINES + 1}.0")
+        if at_bottom:
+            textbox.see("end")
     
     def log_system(self, message: str) -> None:
         """Add a system message to the console log."""
@@ -2037,73 +2952,82 @@ class KeithGUI(ctk.CTk):
             self.log_console(message, level)
     
     def log_memory(self, message: str, tag: str = "user") -> None:
-        """Add a conversation message to the memory panel."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.memory_log.configure(state="normal")
-        
-        # Parse channel from message if present
-        if message.startswith("[#"):
-            bracket_end = message.find("]")
-            if bracket_end > 0:
-                channel_part = message[1:bracket_end]  # e.g., "#general"
-                rest = message[bracket_end + 1:].strip()
-                self.memory_log._textbox.insert("end", f"[{timestamp}] ", "timestamp")
-                self.memory_log._textbox.insert("end", f"[{channel_part}] ", "channel")
-                self.memory_log._textbox.insert("end", f"{rest}\n", tag)
-            else:
-                self.memory_log._textbox.insert("end", f"[{timestamp}] ", "timestamp")
-                self.memory_log._textbox.insert("end", f"{message}\n", tag)
-        else:
-            self.memory_log._textbox.insert("end", f"[{timestamp}] ", "timestamp")
-            self.memory_log._textbox.insert("end", f"{message}\n", tag)
-        
-        self.memory_log.configure(state="disabled")
-        self.memory_log.see("end")
-    
+        """Add a conversation message to the memory panel (buffered)."""
+        self._memory_pending.append((self._now_ts(), "timestamp"))
+
+        # Parse channel from message if present - partition scans once for
+        # "]" instead of find + two slices
+        if message[:2] == "[#":
+            head, sep, rest = message.partition("]")
+            if sep:
+                self._memory_pending.append((f"[{head[1:]}] ", "channel"))  # e.g., "#general"
+                self._memory_pending.append((f"{rest.lstrip()}\n", tag))
+                self._schedule_flush()
+                return
+        self._memory_pending.append((f"{message}\n", tag))
+        self._schedule_flush()
+
+    def log_memory_stream_start(self, channel_name: str) -> None:
+        """Open a streamed Keith response line in the memory panel."""
+        self._memory_pending.append((self._now_ts(), "timestamp"))
+        self._memory_pending.append((f"[#{channel_name}] ", "channel"))
+        self._memory_pending.append(("Keith: ", "keith"))
+        self._schedule_flush()
+
+    def log_memory_delta(self, text: str) -> None:
+        """Append a streamed response fragment to the open line."""
+        self._memory_pending.append((text, "keith"))
+        self._schedule_flush()
+
+    def log_memory_stream_end(self) -> None:
+        """Close the streamed response line."""
+        self._memory_pending.append(("\n", "keith"))
+        self._schedule_flush()
+
     def log_context(self, channel_name: str, context_messages: list[dict]) -> None:
-        """Log the recent channel context that Keith sees."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.memory_log.configure(state="normal")
-        
+        """Log the recent channel context that Keith sees (buffered)."""
         # Add a context header
-        self.memory_log._textbox.insert("end", f"[{timestamp}] ", "timestamp")
-        self.memory_log._textbox.insert("end", f"[#{channel_name}] ", "channel")
-        self.memory_log._textbox.insert("end", "── Recent Context ──\n", "divider")
-        
-        # Log each context message
-        for msg in context_messages:
-            self.memory_log._textbox.insert("end", f"         ", "timestamp")  # Indent
-            self.memory_log._textbox.insert("end", f"{msg['author']}: ", "context_author")
-            self.memory_log._textbox.insert("end", f"{msg['content']}\n", "context_msg")
-        
-        self.memory_log._textbox.insert("end", "         ────────────────────\n", "divider")
-        
-        self.memory_log.configure(state="disabled")
-        self.memory_log.see("end")
+        self._memory_pending.append((self._now_ts(), "timestamp"))
+        self._memory_pending.append((f"[#{channel_name}] ", "channel"))
+        self._memory_pending.append(("── Recent Context ──\n", "divider"))
+
+        # Pre-join the whole context block so the flush issues one insert for
+        # it instead of three per line (indent/author/content)
+        body = "".join(
+            f"         {msg['author']}: {msg['content']}\n"
+            for msg in context_messages
+        )
+        self._memory_pending.append((body, "context_msg"))
+
+        self._memory_pending.append(("         ────────────────────\n", "divider"))
+        self._schedule_flush()
     
     def _clear_console_logs(self) -> None:
         """Clear only the console logs display."""
-        self.console_log.configure(state="normal")
-        self.console_log.delete("1.0", "end")
-        self.console_log.configure(state="disabled")
+        self._console_pending.clear()
+        with _writable(self.console_log):
+            self.console_log.delete("1.0", "end")
         self.log_console("Console cleared", "info")
     
     def _erase_memory(self) -> None:
         """Clear the memory display and AI conversation history."""
         # Clear display
-        self.memory_log.configure(state="normal")
-        self.memory_log.delete("1.0", "end")
-        self.memory_log.configure(state="disabled")
+        self._memory_pending.clear()
+        with _writable(self.memory_log):
+            self.memory_log.delete("1.0", "end")
         
-        # Clear AI memory
-        if self.bot and hasattr(self.bot, 'claude'):
+        # Clear AI memory (KeithBot always owns a ClaudeHandler)
+        if self.bot is not None:
             self.bot.claude.clear_all_history()
             self.log_console("AI memory erased", "success")
         else:
             self.log_console("Memory display cleared", "info")
     
     def clear_chat_log(self) -> None:
-        """Clear both console and memory (called by Keith clear command)."""
+        """Clear both console and memory (safe to call from any thread)."""
+        if threading.current_thread() is not threading.main_thread():
+            self._gui_queue.put(self.clear_chat_log)
+            return
         self._clear_console_logs()
         self._erase_memory()
     
@@ -2213,9 +3137,12 @@ class KeithGUI(ctk.CTk):
     def _toggle_connection(self) -> None:
         """Connect or disconnect the bot."""
         if self.bot and self.bot._ready:
-            # Disconnect
+            # Disconnect. call_soon_threadsafe + create_task skips the
+            # concurrent.futures.Future that run_coroutine_threadsafe
+            # allocates for a result nobody reads.
             self.set_status("disconnected", "Disconnecting...")
-            asyncio.run_coroutine_threadsafe(self.bot.close(), self.bot.loop)
+            bot = self.bot
+            bot.loop.call_soon_threadsafe(lambda: bot.loop.create_task(bot.close()))
         else:
             # Connect
             self._start_bot()
@@ -2234,19 +3161,36 @@ class KeithGUI(ctk.CTk):
         
         self.bot = KeithBot(self)
         self.bot.smart_detection = self.smart_detection_var.get()  # Sync toggle state
-        
-        def run_bot():
+
+        # One persistent event-loop thread for the bot's lifetime. bot.run
+        # would create and tear down a fresh loop (and asyncio state) on
+        # every connect; reusing a long-lived loop avoids that and gives
+        # queue_message/queue_action a stable loop to target.
+        if self.bot_loop is None:
+            # uvloop's C loop cuts websocket parse/dispatch latency; the
+            # stock loop is the fallback where it isn't installed.
+            if uvloop is not None:
+                self.bot_loop = uvloop.new_event_loop()
+            else:
+                self.bot_loop = asyncio.new_event_loop()
+            self.bot_thread = threading.Thread(
+                target=self.bot_loop.run_forever,
+                daemon=True,
+                name="discord-loop"
+            )
+            self.bot_thread.start()
+
+        async def start_bot():
             try:
-                self.bot.run(Config.BOT_TOKEN)
+                await self.bot.start(Config.BOT_TOKEN)
             except discord.errors.LoginFailure:
-                self.after(0, lambda: self.set_status("error", "Invalid token"))
-                self.after(0, lambda: self.log_chat("Invalid Discord token", "error"))
+                self.post(lambda: self.set_status("error", "Invalid token"))
+                self.post(lambda: self.log_chat("Invalid Discord token", "error"))
             except Exception as e:
-                self.after(0, lambda: self.set_status("error", "Connection failed"))
-                self.after(0, lambda: self.log_chat(f"Error: {e}", "error"))
-        
-        self.bot_thread = threading.Thread(target=run_bot, daemon=True)
-        self.bot_thread.start()
+                self.post(lambda: self.set_status("error", "Connection failed"))
+                self.post(lambda e=e: self.log_chat(f"Error: {e}", "error"))
+
+        asyncio.run_coroutine_threadsafe(start_bot(), self.bot_loop)
     
     def _send_manual_message(self) -> None:
         """Send a manual message to the selected channel."""
@@ -2256,15 +3200,9 @@ class KeithGUI(ctk.CTk):
         message = self.message_entry.get().strip()
         if not message:
             return
-        
+
         # Get selected channel
-        selection = self.channel_dropdown.get()
-        channel_id = None
-        for cid, name, guild in self.channels:
-            if f"#{name} ({guild})" == selection:
-                channel_id = cid
-                break
-        
+        channel_id = self._display_to_id.get(self.channel_dropdown.get())
         if channel_id:
             self.bot.queue_message(channel_id, message)
             self.message_entry.delete(0, "end")
@@ -2278,14 +3216,9 @@ class KeithGUI(ctk.CTk):
         if self.tomato_msg_var.get():
             message = self.tomato_msg_entry.get().strip()
             if message:
-                # Get selected channel
-                selection = self.channel_dropdown.get()
-                channel_id = None
-                for cid, name, guild in self.channels:
-                    if f"#{name} ({guild})" == selection:
-                        channel_id = cid
-                        break
-                
+                # Get selected channel - O(1) via the display-name map
+                channel_id = self._display_to_id.get(self.channel_dropdown.get())
+
                 if channel_id:
                     self.bot.queue_message(channel_id, message)
                     self.log_console(f"Sent message: {message}", "info")
@@ -2296,10 +3229,13 @@ class KeithGUI(ctk.CTk):
     def _on_close(self) -> None:
         """Handle window close."""
         if self.bot:
+            bot = self.bot
             try:
-                asyncio.run_coroutine_threadsafe(self.bot.close(), self.bot.loop)
+                bot.loop.call_soon_threadsafe(lambda: bot.loop.create_task(bot.close()))
             except Exception:
                 pass
+        if self.bot_loop is not None:
+            self.bot_loop.call_soon_threadsafe(self.bot_loop.stop)
         self.quit()
 
 